@@ -2,181 +2,304 @@
 # CPySingle: extends a single class with Context-Oriented Programming (COP)
 # The scope of layer activation and deactivation is limited to a single class
 
+import itertools
+import sys
+import weakref
+from collections import deque
+from types import MappingProxyType
 from enum import Enum
-from typing import Any, Dict, List, Callable, Type, Optional, Tuple, Union, Protocol
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Callable, Type, Optional, Sequence, Tuple, Protocol
 
 class CPyRequestType(Enum):
     ACTIVATE = 'act'
     DEACTIVATE = 'dea'
 
+# The last element of every execution chain, including the base-only chain run when no layer
+# method applies: proceed() called by the base method ends up here and returns None
+def _end_of_chain(self: Any, *args: Any, **kwargs: Any) -> None:
+    return None
+
+def _no_base_method(self: Any, *args: Any, **kwargs: Any) -> None:
+    raise RuntimeError("proceed() called without active base method")
+
+# The chain of an instance outside of any base method call
+_NO_CHAIN: Tuple[Callable, ...] = (_no_base_method,)
+
 class CPySingle(object):
+    # Subclasses that do not declare __slots__ themselves still get a __dict__ for their own attributes
+    __slots__ = ('_active_layers', '_layer_key', '_chain', '_idx')
+
     class Layer(Enum):
         BASE = 'base'
 
-    layers: Dict[Enum, Dict[str, Callable]]
+    # read-only view of the registered layer methods: { layer: { base_method_name: method } };
+    # register through add_layer/add_method so that the index below and the chain cache stay in sync
+    layers: Mapping[Enum, Mapping[str, Callable]]
+    _layers: Dict[Enum, Mapping[str, Callable]]
+    # the same registrations indexed by base method name: { base_method_name: { layer: method } }
+    # (replaced by a per-class dict in init_layer before anything is registered)
+    _method_layers: Dict[str, Dict[Enum, Callable]] = {}
+    # optional execution order of layers; when empty, layers run in activation order
+    _layer_order: Sequence[Enum] = ()
+    # resolved execution chains shared by all instances of a class:
+    # { (layer state id of the active layers, base method): (layer funcs..., base func) }
+    # keyed by the base method itself rather than its name: a subclass overriding a base method
+    # and calling super() runs the parent's base method with the same name and the same class
+    _chain_cache: Dict[Tuple[int, Callable], Tuple[Callable, ...]] = {}
+    # upper bound of cached chains per class, evicted least recently used first;
+    # activation orders of many layers could grow it without limit
+    _chain_cache_maxsize: int = 256
+    # version of the layer requests applied to an instance; see CPy for lazily applied global requests
+    _global_version: int = 0
+    _seen_version: int = 0
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # every class gets its own chain cache; chains depend on the class' layers and _layer_order
+        cls._chain_cache = {}
 
     @classmethod
     def init_layer(cls) -> None:
         if not hasattr(cls, 'layers'):
-            cls.layers = {}
+            cls._layers = {}
+            cls.layers = MappingProxyType(cls._layers)
+            cls._method_layers = {}
+
+    @classmethod
+    def _layer_owner(cls) -> Type['CPySingle']:
+        # the class whose registry cls uses; init_layer only gives one to the first class that
+        # registers, and its subclasses share it
+        for klass in cls.__mro__:
+            if '_layers' in vars(klass):
+                return klass
+        return cls
+
+    @classmethod
+    def purge_chain_cache(cls) -> None:
+        # registering layers or methods changes how chains resolve, also for subclasses
+        # that inherit this class' layers
+        cls._chain_cache = {}
+        for subclass in cls.__subclasses__():
+            subclass.purge_chain_cache()
+
+    @classmethod
+    def _check_layer(cls, layer: Enum) -> None:
+        # the base methods themselves make up the BASE layer; a method registered under it would never run
+        if layer is CPySingle.Layer.BASE:
+            raise ValueError(f"Layer '{layer}' is reserved for base methods. Use @cpybase to define a base method.")
 
     @classmethod
     def add_layer(cls, layer: Enum) -> None:
+        cls._check_layer(layer)
         cls.init_layer()
         if layer in cls.layers:
             raise ValueError(f"Layer '{layer}' already exists. Cannot add duplicate layer.")
-        cls.layers[layer] = {}
+        cls._layers[layer] = MappingProxyType({})
+        # every class sharing the registry may have cached chains, not only cls and its subclasses
+        cls._layer_owner().purge_chain_cache()
 
     @classmethod
     def add_method(cls, layer: Enum, name: str, method: Callable) -> None:
+        cls._check_layer(layer)
         cls.init_layer()
         if layer not in cls.layers:
             cls.add_layer(layer)
-        cls.layers[layer][name] = method
+        cls._layers[layer] = MappingProxyType({**cls._layers[layer], name: method})
+        cls._method_layers.setdefault(name, {})[layer] = method
+        cls._layer_owner().purge_chain_cache()
 
     def __init__(self) -> None:
         super(CPySingle, self).__init__()
-        # array of activated layers
-        self._layer: List[Enum] = [CPySingle.Layer.BASE]
-        # Stores the execution state for each base method call:
-        # { base_method_name: { 'chain': List[Callable], 'index': int } }
-        self._execution_state: Dict[str, Dict[str, Union[List[Callable], int]]] = {}
-        # cache (This might still be useful for performance, but the logic needs adjustment)
-        # self.cache: Dict[Enum, List[Callable]] = {}
-        # self.purge_cache()
-
-    # def purge_cache(self) -> None:
-    #     self.cache = {}
-    #     self._execution_state = {} # Clear on reset too
-
+        # layer state of the instance (see _layer_state): its id, used as the chain cache key
+        # (0 means only BASE is active), and the activated layers in activation order with the
+        # number of times each one is activated. The mapping is shared and read-only.
+        self._layer_key: int
+        self._active_layers: Mapping[Enum, int]
+        self._layer_key, self._active_layers = _BASE_STATE
+        # Execution state of the innermost running base method call:
+        # the resolved chain (layer funcs..., base func) and the index of the running func.
+        # Chains are immutable tuples, so proceed() only moves the index.
+        self._chain: Tuple[Callable, ...] = _NO_CHAIN
+        self._idx: int = -1
+
+    # Activating/deactivating never purges the chain cache: the layer state is part of the
+    # cache key, so a layer change simply selects another cached chain.
+    # Activations are counted: a layer activated n times stays active until it is deactivated
+    # n times, so nested activations of the same layer (e.g. nested Layer blocks) unwind correctly.
+    # Both look up the memoized transition from the current state, so usually no state is built.
     def activate(self, layer: Enum) -> None:
-        # self.purge_cache() # Activating/deactivating shouldn't purge execution state
-        if layer not in self._layer:
-            self._layer.append(layer)
+        key = (self._layer_key, layer)
+        try:
+            state = _activated_states[key]
+        except KeyError:
+            layers = dict(self._active_layers)
+            # re-activating an active layer keeps its original position
+            layers[layer] = layers.get(layer, 0) + 1
+            state = _activated_states[key] = _layer_state(layers)
+        self._layer_key, self._active_layers = state
 
     def deactivate(self, layer: Enum) -> None:
-        # self.purge_cache() # Activating/deactivating shouldn't purge execution state
-        if layer in self._layer:
-            self._layer.remove(layer)
-
+        key = (self._layer_key, layer)
+        try:
+            state = _deactivated_states[key]
+        except KeyError:
+            layers = dict(self._active_layers)
+            count = layers.get(layer, 0)
+            if count > 1:
+                layers[layer] = count - 1
+            elif count == 1 and layer is not CPySingle.Layer.BASE:
+                del layers[layer]
+            state = _deactivated_states[key] = _layer_state(layers)
+        self._layer_key, self._active_layers = state
+
+    # Applies layer requests that were posted but not applied yet (none for CPySingle)
+    def _sync(self) -> None:
+        pass
+
+    # array of activated layers
+    @property
+    def _layer(self) -> List[Enum]:
+        self._sync()
+        return list(self._active_layers)
+
+    # Every chain is terminated by a sentinel (_end_of_chain, or _no_base_method outside of a base
+    # method call), so proceed() never has to check where it is in the chain.
     def proceed(self, *args: Any, **kwargs: Any) -> Any:
-        # Get the name of the currently executing base method.
-        # This requires the runtime_behavior_of_base_method to set this context.
-        # A simple way is to assume the last added state in _execution_state is the current one.
-        # This works for CPySingle where base methods are not expected to be called re-entrantly.
-        if not self._execution_state:
-             raise RuntimeError("proceed() called without active base method")
-
-        # Get the name of the most recent base method call
-        current_base_method_name = list(self._execution_state.keys())[-1]
-        state = self._execution_state[current_base_method_name]
-        execution_chain: List[Callable] = state['chain'] # type: ignore[assignment]
-        current_index: int = state['index'] # type: ignore[assignment]
-
-        next_index = current_index + 1
-
-        if next_index < len(execution_chain):
-            state['index'] = next_index
-            next_func = execution_chain[next_index]
-            retval: Any = next_func(self, *args, **kwargs)
-            return retval
-        else:
-            # If we've gone past the end of the chain, it means the last function called proceed.
-            # The chain is now complete for this base method call.
-            # Clean up the state for this base method.
-            del self._execution_state[current_base_method_name]
-            # Return None or potentially the result of the last executed function if needed,
-            # but the current structure implies the return value comes from the executed function.
-            return None # Or perhaps the return value of the last executed function? Let's stick to None for now.
+        i = self._idx + 1
+        self._idx = i
+        try:
+            return self._chain[i](self, *args, **kwargs)
+        finally:
+            # restore the cursor so the caller may proceed() again
+            self._idx = i - 1
+
+
+# the base layer marker; Enum members are singletons, so it is compared by identity
+_BASE = CPySingle.Layer.BASE
+
+# Layer states: active layers in activation order with their activation counts. States are
+# interned, so instances with the same active layers share one read-only mapping and its id.
+# Enum.__hash__ is implemented in Python, so hashing the active layers on every dispatched call
+# or layer change would be costly; instead a dispatch uses the state id as cache key, and a layer
+# change looks up the memoized transition keyed by the current state id and the layer.
+_LayerState = Tuple[int, Mapping[Enum, int]]
+_BASE_STATE: _LayerState = (0, MappingProxyType({_BASE: 1}))
+_layer_states: Dict[Tuple[Tuple[Enum, int], ...], _LayerState] = {((_BASE, 1),): _BASE_STATE}
+# { (layer state id, layer): layer state after activating / deactivating the layer }
+_activated_states: Dict[Tuple[int, Enum], _LayerState] = {}
+_deactivated_states: Dict[Tuple[int, Enum], _LayerState] = {}
+# upper bound of the state table; once reached it is dropped and started over with the transitions
+_layer_states_maxsize: int = 1024
+# ids are never reused, so the ids instances and chain caches still hold stay unambiguous
+_layer_state_id_counter = itertools.count(1)
+
+def _layer_state(active_layers: Dict[Enum, int]) -> _LayerState:
+    key = tuple(active_layers.items())
+    try:
+        return _layer_states[key]
+    except KeyError:
+        if len(_layer_states) >= _layer_states_maxsize:
+            # a state seen again afterwards gets a new id, and so a new chain cache entry
+            _layer_states.clear()
+            _activated_states.clear()
+            _deactivated_states.clear()
+            _layer_states[((_BASE, 1),)] = _BASE_STATE
+        state = _layer_states[key] = (next(_layer_state_id_counter), MappingProxyType(active_layers))
+        return state
+
+# LayerMethodRegistrar: what the layer decorators leave in the class body. Once the class is created,
+# it registers the layer method and puts the plain function back in its place, so accessing it
+# costs nothing extra
+class LayerMethodRegistrar(object):
+    __slots__ = ('func_to_decorate', 'registrations')
 
-
-# LayerMethodRegistrar: Helper class for accessing and registering class and method from the decorator
-class LayerMethodRegistrar:
     def __init__(self, func_to_decorate: Callable, layer: Enum, base_method_name: str) -> None:
+        # interned so that registrations made with a computed name share the base method's key object
+        registrations: List[Tuple[Enum, str]] = [(layer, sys.intern(base_method_name))]
+        if isinstance(func_to_decorate, LayerMethodRegistrar):
+            # stacked layer decorators register the same function under each layer
+            registrations = func_to_decorate.registrations + registrations
+            func_to_decorate = func_to_decorate.func_to_decorate
         self.func_to_decorate: Callable = func_to_decorate
-        self.layer: Enum = layer
-        self.base_method_name: str = base_method_name
+        self.registrations: List[Tuple[Enum, str]] = registrations
 
     def __set_name__(self, owner_cls: Type, name_in_class: str) -> None:
         if hasattr(owner_cls, 'add_method') and callable(owner_cls.add_method):
-            owner_cls.add_method(self.layer, self.base_method_name, self.func_to_decorate)
+            setattr(owner_cls, name_in_class, self.func_to_decorate)
+            for layer, base_method_name in self.registrations:
+                owner_cls.add_method(layer, base_method_name, self.func_to_decorate)
         else:
             raise TypeError(
                 f"The class {owner_cls.__name__} where '{name_in_class}' is defined "
                 f"does not have an 'add_method'. Ensure it inherits from CPySingle or CPy."
             )
 
-    def __get__(self, instance: Optional[Any], owner_cls: Type) -> Callable:
-        if instance is None:
-            return self.func_to_decorate
-        return self.func_to_decorate.__get__(instance, owner_cls)
-
 class CPyBaseWithLayer(Protocol):
     layer: Callable[[Enum], Callable]
     def __call__(self, *args: Any, **kwargs: Any) -> Any: ...
 
 def cpybase(original_base_func: Callable) -> CPyBaseWithLayer:
-    def build_execution_chain(self_instance: Any, base_fname: str) -> List[Callable]:
-        execution_chain: List[Callable] = []
-        class_layers: Dict[Enum, Dict[str, Callable]] = getattr(self_instance.__class__, 'layers', {})
-        defined_layer_order: List[Enum] = getattr(self_instance.__class__, '_layer_order', []) # Get defined order
-
-        # If _layer_order is not defined, fall back to activation order (current behavior)
-        if not defined_layer_order:
-             defined_layer_order = [layer for layer in self_instance._layer if layer != CPySingle.Layer.BASE]
-             # Optionally sort by definition order if available in class_layers, but _layer_order is clearer
-
-        # Build the chain based on defined order, including only active layers
-        for layer_key in defined_layer_order:
-             if layer_key in self_instance._layer and layer_key in class_layers:
-                 layer_specific_methods: Dict[str, Callable] = class_layers[layer_key]
-                 if isinstance(layer_specific_methods, dict) and base_fname in layer_specific_methods:
-                     execution_chain.append(layer_specific_methods[base_fname])
-
-        # Always append the base method at the end of the chain
-        if CPySingle.Layer.BASE in class_layers and base_fname in class_layers[CPySingle.Layer.BASE]:
-             execution_chain.append(class_layers[CPySingle.Layer.BASE][base_fname])
+    # Resolved once at decoration time and captured by the closures below
+    fname: str = sys.intern(original_base_func.__name__)
+    # The chain when no layer method runs: the base method's proceed() still returns None
+    base_chain: Tuple[Callable, ...] = (original_base_func, _end_of_chain)
+
+    def build_execution_chain(cls: Type, active_layers: Mapping[Enum, int], base_fname: str) -> Tuple[Callable, ...]:
+        # layer methods registered for this base method only
+        method_layers = cls._method_layers.get(base_fname)
+        if not method_layers:
+            # No layer defines this method: the chain is just the base method
+            return base_chain
+        # Layers run in the class' _layer_order if it defines one, otherwise in activation order
+        defined_layer_order: Sequence[Enum] = cls._layer_order
+        if defined_layer_order:
+            active_in_order: Iterable[Enum] = (layer for layer in defined_layer_order if layer in active_layers)
         else:
-             # This case should ideally not happen if cpybase is used correctly
-             # but as a fallback, append the original function if not found in layers
-             execution_chain.append(original_base_func)
+            active_in_order = (layer for layer in active_layers if layer is not _BASE)
 
-
-        return execution_chain
+        # Build the chain in one pass, with the base method always at the end (before the sentinel)
+        return (*(method_layers[layer] for layer in active_in_order if layer in method_layers),
+                original_base_func, _end_of_chain)
 
     # This is the function that is actually registered as a class method and called at runtime
     def runtime_behavior_of_base_method(self_instance: Any, *args: Any, **kwargs: Any) -> Any:
-        fname: str = original_base_func.__name__
-
-        # Build the execution chain based on defined order and active layers
-        execution_chain = build_execution_chain(self_instance, fname)
-
-        if not execution_chain:
-            # If no active layers and no base method found (shouldn't happen with base method always added)
-            # or if the base method itself wasn't registered correctly.
-            # As a fallback, call the original base function directly.
-            return original_base_func(self_instance, *args, **kwargs)
-
-        # Store the execution chain and starting index (before the first element)
-        self_instance._execution_state[fname] = {
-            'chain': execution_chain,
-            'index': -1 # Start index at -1 so the first proceed() call executes the first element (index 0)
-        }
-
-        # Start the execution by calling proceed()
-        # The first call to proceed will execute the first function in the chain
-        retval: Any = self_instance.proceed(*args, **kwargs)
-
-        # The state for this base method call is cleared within the last proceed() call
-        # when the index goes out of bounds.
-
-        return retval
+        cls = self_instance.__class__
+        if self_instance._seen_version != cls._global_version:
+            self_instance._sync()
+
+        layer_key = self_instance._layer_key
+        if not layer_key:
+            # Only BASE is active: run the base method alone without a cache lookup
+            execution_chain = base_chain
+        else:
+            # Look up the execution chain for the active layers; build it only on a cache miss
+            chain_cache = cls._chain_cache
+            key = (layer_key, runtime_behavior_of_base_method)
+            try:
+                # taken out and put back below, so the cache is ordered from least to most recently used
+                execution_chain = chain_cache.pop(key)
+            except KeyError:
+                if len(chain_cache) >= cls._chain_cache_maxsize:
+                    # evict the least recently used entry
+                    del chain_cache[next(iter(chain_cache))]
+                execution_chain = build_execution_chain(cls, self_instance._active_layers, fname)
+            chain_cache[key] = execution_chain
+
+        # Save the state of an enclosing base method call (nested or recursive dispatch)
+        saved_chain, saved_idx = self_instance._chain, self_instance._idx
+        # Run the first element of the chain directly; its proceed() calls continue from index 0
+        self_instance._chain = execution_chain
+        self_instance._idx = 0
+        try:
+            return execution_chain[0](self_instance, *args, **kwargs)
+        finally:
+            self_instance._chain = saved_chain
+            self_instance._idx = saved_idx
 
     def layer_decorator_factory(layer: Enum) -> Callable:
         def decorator(layer_function_to_register: Callable) -> LayerMethodRegistrar:
-            # Register the layer method using LayerMethodRegistrar
-            # Get the base method name from original_base_func.__name__
-            return LayerMethodRegistrar(layer_function_to_register, layer, original_base_func.__name__)
+            # Register the layer method under the base method name
+            return LayerMethodRegistrar(layer_function_to_register, layer, fname)
         return decorator
 
     # Dynamically add the 'layer' attribute with type hint
@@ -193,53 +316,121 @@ def cpylayer(layer: Enum, base_method_name: str) -> Callable:
 # CPy: extends multiple classes with Context-Orientated Programming (COP)
 # The scope of layer activation and deactivation is not limited to a single class
 class CPy(CPySingle):
-    instances: List["CPy"] = []
+    __slots__ = ('_queued_request', 'in_critical', '_seen_version', '__weakref__')
+
+    # live instances only; instances are dropped from the set once they are garbage collected
+    instances: "weakref.WeakSet[CPy]" = weakref.WeakSet()
+    # Global layer requests are not pushed to every instance right away. They are appended to
+    # a log shared by all instances, and each instance replays the entries it has not seen yet
+    # the next time it dispatches a base method or its layers are inspected.
+    # _global_log[0] is the request with version _global_log_base + 1.
+    _global_log: List[Tuple[CPyRequestType, Enum]] = []
+    _global_log_base: int = 0
+    # once the log is this long, every instance is brought up to date and the log is dropped
+    _global_log_maxsize: int = 64
+    # Replaying the same pending requests from the same layer state always ends in the same state,
+    # so the outcome is shared: { (seen version, layer state id): layer state after the replay }.
+    # Valid for the current _global_version only; post() drops it. This keeps bringing every
+    # instance up to date at one lookup per instance instead of one replay per instance.
+    _global_replays: Dict[Tuple[int, int], _LayerState] = {}
 
     def __init__(self) -> None:
         super(CPy, self).__init__()
-        self.queued_request: List[Tuple[CPyRequestType, Enum]] = []
+        # requests queued during a critical section, replayed in order by do()
+        self._queued_request: Deque[Tuple[CPyRequestType, Enum]] = deque()
         self.in_critical: bool = False
-        CPy.instances.append(self)
+        # requests posted before this instance existed do not apply to it
+        self._seen_version = CPy._global_version
+        CPy.instances.add(self)
 
     @classmethod
     def activate(cls, layer: Enum) -> None:
-        for i in CPy.instances:
-            i.req_activate(layer)
+        CPy.post(CPyRequestType.ACTIVATE, layer)
 
     @classmethod
     def deactivate(cls, layer: Enum) -> None:
-        for i in CPy.instances:
-            i.req_deactivate(layer)
+        CPy.post(CPyRequestType.DEACTIVATE, layer)
+
+    @classmethod
+    def post(cls, request_type: CPyRequestType, layer: Enum) -> None:
+        if len(CPy._global_log) >= CPy._global_log_maxsize:
+            for i in CPy.instances:
+                i._sync()
+            CPy._global_log = []
+            CPy._global_log_base = CPy._global_version
+        CPy._global_log.append((request_type, layer))
+        CPy._global_version += 1
+        CPy._global_replays = {}
+
+    def _sync(self) -> None:
+        seen = self._seen_version
+        if seen == CPy._global_version:
+            return
+        self._seen_version = CPy._global_version
+        pending = CPy._global_log[seen - CPy._global_log_base:]
+        if self.in_critical:
+            # queue the log's request tuples themselves; they are shared by every instance
+            self._queued_request.extend(pending)
+            return
+        key = (seen, self._layer_key)
+        try:
+            self._layer_key, self._active_layers = CPy._global_replays[key]
+        except KeyError:
+            for request_type, layer in pending:
+                if request_type is CPyRequestType.ACTIVATE:
+                    super(CPy, self).activate(layer)
+                else:
+                    super(CPy, self).deactivate(layer)
+            CPy._global_replays[key] = (self._layer_key, self._active_layers)
+
+    @property
+    def queued_request(self) -> List[Tuple[CPyRequestType, Enum]]:
+        # snapshot of the pending requests
+        self._sync()
+        return list(self._queued_request)
+
+    @queued_request.setter
+    def queued_request(self, requests: Iterable[Tuple[CPyRequestType, Enum]]) -> None:
+        # replaces the pending requests, including global requests posted before the assignment
+        self._sync()
+        self._queued_request = deque(requests)
 
     def req_activate(self, layer: Enum) -> None:
+        self._sync()
         if self.in_critical:
-            self.queued_request.append((CPyRequestType.ACTIVATE, layer))
+            self._queued_request.append((CPyRequestType.ACTIVATE, layer))
         else:
             super(CPy, self).activate(layer)
 
     def req_deactivate(self, layer: Enum) -> None:
+        self._sync()
         if self.in_critical:
-            self.queued_request.append((CPyRequestType.DEACTIVATE, layer))
+            self._queued_request.append((CPyRequestType.DEACTIVATE, layer))
         else:
             super(CPy, self).deactivate(layer)
 
     def begin(self) -> None:
+        # requests posted before the critical section are applied, not queued
+        self._sync()
         self.in_critical = True
 
     def end(self) -> None:
+        self._sync()
         self.do()
         self.in_critical = False
 
     def do(self) -> None:
-        for r in self.queued_request:
-            if r[0] == CPyRequestType.ACTIVATE:
-                super(CPy, self).activate(r[1])
-            elif r[0] == CPyRequestType.DEACTIVATE:
-                super(CPy, self).deactivate(r[1])
-        self.queued_request = []
+        queue = self._queued_request
+        while queue:
+            request_type, layer = queue.popleft()
+            if request_type is CPyRequestType.ACTIVATE:
+                super(CPy, self).activate(layer)
+            else:
+                super(CPy, self).deactivate(layer)
 
 # Critical: a context manager for critical section
 class Critical(object):
+    __slots__ = ('obj',)
 
     def __init__(self, obj: CPy) -> None:
         self.obj: CPy = obj
@@ -252,6 +443,7 @@ class Critical(object):
 
 # Layer: a context manager for layer activation and deactivation
 class Layer(object):
+    __slots__ = ('layer_name',)
 
     def __init__(self, layer: Enum) -> None:
         self.layer_name: Enum = layer
@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import gc
 import unittest
 from cpy import CPy, cpybase, Critical, Layer, CPyRequestType
 from enum import Enum
@@ -51,6 +52,9 @@ class TestCPy(unittest.TestCase):
         self.instance_b = SubClassB()
 
     def test_individual_layer_activation_deactivation(self):
+        # activate() on an instance is CPy.activate, so the layers are active process-wide
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.LAYERA)
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.LAYERB)
         # Activate layer and call method, verify result
         self.instance_a.activate(LayerEnumForTest.LAYERA)
         self.assertEqual(self.instance_a.method_a(), "layerA method for SubClassA")
@@ -64,6 +68,7 @@ class TestCPy(unittest.TestCase):
         self.assertEqual(self.instance_b.method_b(), "SubClassB base method")
 
     def test_global_layer_activation_deactivation(self):
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.GLOBAL_LAYER)
         # Activate layer globally and verify it affects all instances
         CPy.activate(LayerEnumForTest.GLOBAL_LAYER)
         self.assertEqual(self.instance_a.method_a(), "global layer method for SubClassA")
@@ -74,6 +79,51 @@ class TestCPy(unittest.TestCase):
         self.assertEqual(self.instance_a.method_a(), "SubClassA base method")
         self.assertEqual(self.instance_b.method_b(), "SubClassB base method")
 
+    def test_global_request_applied_lazily(self):
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.GLOBAL_LAYER)
+        CPy.activate(LayerEnumForTest.GLOBAL_LAYER)
+        # the request is applied when the instance next dispatches or is inspected
+        self.assertEqual("global layer method for SubClassA", self.instance_a.method_a())
+        self.assertEqual([CPy.Layer.BASE, LayerEnumForTest.GLOBAL_LAYER], self.instance_b._layer)
+
+        # instances created after a global request are not affected by it
+        late = SubClassA()
+        self.assertEqual("SubClassA base method", late.method_a())
+        CPy.deactivate(LayerEnumForTest.GLOBAL_LAYER)
+        self.assertEqual("SubClassA base method", self.instance_a.method_a())
+
+    def test_global_log_is_bounded(self):
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.LAYERA)
+        for _ in range(CPy._global_log_maxsize):
+            CPy.activate(LayerEnumForTest.GLOBAL_LAYER)
+            CPy.deactivate(LayerEnumForTest.GLOBAL_LAYER)
+        CPy.activate(LayerEnumForTest.LAYERA)
+        self.assertLessEqual(len(CPy._global_log), CPy._global_log_maxsize)
+        self.assertEqual("layerA method for SubClassA", self.instance_a.method_a())
+        self.assertEqual("SubClassB base method", self.instance_b.method_b())
+        CPy.deactivate(LayerEnumForTest.LAYERA)
+        self.assertEqual("SubClassA base method", self.instance_a.method_a())
+
+    def test_global_requests_replayed_per_layer_state(self):
+        # Instances in different layer states each end in their own state after a global request
+        other = SubClassA()
+        other.req_activate(LayerEnumForTest.LAYERA)
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.GLOBAL_LAYER)
+        for _ in range(CPy._global_log_maxsize + 1):
+            CPy.activate(LayerEnumForTest.GLOBAL_LAYER)
+            CPy.deactivate(LayerEnumForTest.GLOBAL_LAYER)
+        CPy.activate(LayerEnumForTest.GLOBAL_LAYER)
+        self.assertEqual([CPy.Layer.BASE, LayerEnumForTest.GLOBAL_LAYER], self.instance_a._layer)
+        self.assertEqual([CPy.Layer.BASE, LayerEnumForTest.LAYERA, LayerEnumForTest.GLOBAL_LAYER], other._layer)
+
+    def test_instances_are_not_kept_alive(self):
+        obj = SubClassA()
+        self.assertIn(obj, CPy.instances)
+        count = len(CPy.instances)
+        del obj
+        gc.collect()
+        self.assertEqual(count - 1, len(CPy.instances))
+
     def test_layer_context_manager(self):
         # Temporary layer activation using Layer context manager
         with Layer(LayerEnumForTest.TEMP_LAYERB):
@@ -82,6 +132,14 @@ class TestCPy(unittest.TestCase):
         # Reverts to original behavior upon exiting the context
         self.assertEqual(self.instance_b.method_b(), "SubClassB base method")
 
+    def test_nested_layer_context_manager(self):
+        with Layer(LayerEnumForTest.TEMP_LAYERB):
+            with Layer(LayerEnumForTest.TEMP_LAYERB):
+                pass
+            # the outer block still holds the layer
+            self.assertEqual(self.instance_b.method_b(), "temporary layerB method for SubClassB")
+        self.assertEqual(self.instance_b.method_b(), "SubClassB base method")
+
 
 class CPyQ1(CPy):
     def __init__(self):
@@ -107,6 +165,8 @@ class CPyQ1(CPy):
 class CPyQTest(unittest.TestCase):
 
     def test_Critical(self):
+        # activate() on an instance is CPy.activate, so the layers are active process-wide
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.L1)
         obj = CPyQ1()
 
         with Critical(obj):
@@ -142,5 +202,24 @@ class CPyQTest(unittest.TestCase):
         self.assertEqual(False, obj.l2_callee_called)
         self.assertEqual(True, obj.base_callee_called) # base should be called via proceed
 
+    def test_Critical_replace_queued_request(self):
+        obj = CPyQ1()
+        with Critical(obj):
+            obj.req_activate(LayerEnumForTest.L1)
+            obj.queued_request = [(CPyRequestType.ACTIVATE, LayerEnumForTest.L2)]
+            self.assertEqual([(CPyRequestType.ACTIVATE, LayerEnumForTest.L2)], obj.queued_request)
+        self.assertEqual([CPy.Layer.BASE, LayerEnumForTest.L2], obj._layer)
+
+    def test_Critical_shares_global_requests(self):
+        # A global request queued by several instances is the same object for every instance
+        obj = CPyQ1()
+        other = CPyQ1()
+        self.addCleanup(CPy.deactivate, LayerEnumForTest.L2)
+        with Critical(obj), Critical(other):
+            CPy.activate(LayerEnumForTest.L2)
+            self.assertEqual([(CPyRequestType.ACTIVATE, LayerEnumForTest.L2)], obj.queued_request)
+            self.assertIs(obj.queued_request[0], other.queued_request[0])
+        self.assertEqual([CPy.Layer.BASE, LayerEnumForTest.L2], other._layer)
+
 if __name__ == '__main__':
     unittest.main()
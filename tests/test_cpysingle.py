@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
 import unittest
+import itertools
+import cpy
 from cpy import CPySingle, cpylayer, cpybase
 from enum import Enum
 
@@ -84,8 +86,136 @@ class CPy2(CPySingle):
         self.l1_called = True
 
 
+class CPy3(CPySingle):
+    # base methods without any layer methods; tests register layers on their own subclasses
+
+    @cpybase
+    def test(self):
+        return 'base'
+
+
+class CPy4(CPySingle):
+    # base methods that call proceed() themselves
+
+    @cpybase
+    def test(self):
+        return ('base', self.proceed())
+
+    @cpybase
+    def other(self):
+        pass
+
+    @other.layer(LayerEnum.L1)
+    def other_l1(self):
+        pass
+
+
+class CPy5(CPySingle):
+    # base methods calling other base methods
+
+    def __init__(self):
+        super(CPy5, self).__init__()
+        self.execution_order = []
+
+    @cpybase
+    def outer(self):
+        self.execution_order.append('outer_base')
+
+    @outer.layer(LayerEnum.L1)
+    def outer_l1(self):
+        self.execution_order.append('outer_l1')
+        self.inner()
+        self.proceed()
+
+    @cpybase
+    def inner(self):
+        self.execution_order.append('inner_base')
+
+    @inner.layer(LayerEnum.L1)
+    def inner_l1(self):
+        self.execution_order.append('inner_l1')
+        self.proceed()
+
+    @cpybase
+    def wrap(self):
+        return ('wrap', self.probe())
+
+    @wrap.layer(LayerEnum.L1)
+    def wrap_l1(self):
+        return self.probe()
+
+    @cpybase
+    def probe(self):
+        return ('probe', self.proceed())
+
+
+class CPy6(CPySingle):
+
+    @cpybase
+    def test(self):
+        return ['base6']
+
+    @test.layer(LayerEnum.L1)
+    def test_l1(self):
+        return ['l1'] + self.proceed()
+
+
+class CPy7(CPy6):
+    # overrides the base method and calls the parent's one
+
+    @cpybase
+    def test(self):
+        return ['base7'] + super().test()
+
+
+class CPy8(CPySingle):
+    # one layer method registered under several layers
+
+    @cpybase
+    def test(self):
+        return 'base'
+
+    @cpylayer(LayerEnum.L2, 'test')
+    @test.layer(LayerEnum.L1)
+    def test_l1_l2(self):
+        return 'layer'
+
+
+class CPy9(CPySingle):
+    # does not pass __init_subclass__ on to CPySingle
+
+    def __init_subclass__(cls, **kwargs):
+        pass
+
+
+class CPy10(CPy9):
+
+    @cpybase
+    def test(self):
+        return 'base'
+
+    @test.layer(LayerEnum.L1)
+    def test_l1(self):
+        return 'l1'
+
+
+class CPy11(CPySingle):
+
+    @cpybase
+    def test(self):
+        return 'base'
+
+    alias = CPy10.test_l1 # a plain function again, not registered a second time
+
+
+class CPy12(CPy1):
+    _chain_cache_maxsize = 2
+
 class CPyTest(unittest.TestCase):
 
+    def setUp(self):
+        self.obj = CPy1()
+
     def test_cpy1_check_layers(self):
         # Confirm that L3 layer has also been added
         self.assertEqual(set([LayerEnum.L1, LayerEnum.L2, LayerEnum.L3]), set(CPy1.layers.keys()))
@@ -94,28 +224,39 @@ class CPyTest(unittest.TestCase):
         # Confirm that CPy1 and CPy2 are not polluting each other
         self.assertEqual(set([LayerEnum.L1]), set(CPy2.layers.keys()))
 
+    def test_cpy1_layers_read_only(self):
+        # The registry can only be changed through add_layer/add_method
+        with self.assertRaises(TypeError):
+            CPy1.layers[LayerEnum.L1]['test'] = lambda self: None
+        with self.assertRaises(TypeError):
+            CPy1.layers[LayerEnum.L1] = {}
+
+    def test_cpy1_method_layers_index(self):
+        # Layer methods are also indexed by base method name
+        self.assertEqual({LayerEnum.L1: CPy1.test_l1, LayerEnum.L2: CPy1.test_l2, LayerEnum.L3: CPy1.test_l3},
+                         CPy1._method_layers['test'])
+        self.assertNotIn('skiptest', CPy1._method_layers)
+
     def test_cpy1_test_base_called_without_layers(self):
-        obj = CPy1()
+        obj = self.obj
         obj.test()
         self.assertEqual(True, obj.base_called)
-        self.assertEqual(['base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['base'], obj.execution_order) # Check execution order
 
     def test_cpy1_test_activate_l1_without_proceed(self):
         # Case where L1 is activated and proceed() is not called within the L1 method
-        obj = CPy1()
-        obj.activate(LayerEnum.L1)
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         obj._l1_should_proceed = False # Set to not call proceed()
         obj.test()
         self.assertEqual(False, obj.base_called)
         self.assertEqual(True, obj.l1_called)
         self.assertEqual(False, obj.l2_called) # L2 is not called because proceed() is not called
-        self.assertEqual(['l1'], obj.execution_order) # Check execution order
+        self.assertListEqual(['l1'], obj.execution_order) # Check execution order
 
     def test_cpy1_test_activate_l1_with_proceed(self):
         # Case where L1 is activated and proceed() is called within the L1 method (default behavior)
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         obj._l1_should_proceed = True # Set to call proceed() (default)
         obj.test()
@@ -123,28 +264,28 @@ class CPyTest(unittest.TestCase):
         self.assertEqual(True, obj.base_called)
         self.assertEqual(True, obj.l1_called)
         self.assertEqual(False, obj.l2_called) # L2 is not called because it's not active
-        self.assertEqual(['l1', 'base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['l1', 'base'], obj.execution_order) # Check execution order
 
 
     def test_cpy1_test_actdeact_l1(self):
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         obj._l1_should_proceed = True # Set to call proceed() (default)
         obj.test() # First execution
         # Expect execution to be L1 -> base because L1 is activated and calls proceed(), but L2 is not active
-        self.assertEqual(['l1', 'base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['l1', 'base'], obj.execution_order) # Check execution order
         obj.reset()
         obj.deactivate(LayerEnum.L1)
         obj.test() # Second execution
         self.assertEqual(True, obj.base_called)
         self.assertEqual(False, obj.l1_called)
         self.assertEqual(False, obj.l2_called) # L2 is not called because L1 is deactivated
-        self.assertEqual(['base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['base'], obj.execution_order) # Check execution order
 
 
     def test_cpy1_test_activate_l1_l2_with_proceed(self):
         # Case where L1 and L2 are activated and proceed() is called within L1 and L2 methods
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         obj.activate(LayerEnum.L2)
         obj._l1_should_proceed = True # Set to call proceed() (default)
@@ -152,42 +293,57 @@ class CPyTest(unittest.TestCase):
         self.assertEqual(True, obj.base_called) # base is called because L1 and L2 call proceed()
         self.assertEqual(True, obj.l1_called)
         self.assertEqual(True, obj.l2_called)
-        self.assertEqual(['l1', 'l2', 'base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['l1', 'l2', 'base'], obj.execution_order) # Check execution order
 
 
     def test_cpy1_test_actl1l2_deactl1_with_proceed(self):
         # Case where L1 and L2 are activated, then L1 is deactivated
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         obj.activate(LayerEnum.L2)
         obj._l1_should_proceed = True # Set to call proceed() (default)
         obj.test() # First execution
-        self.assertEqual(['l1', 'l2', 'base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['l1', 'l2', 'base'], obj.execution_order) # Check execution order
         obj.reset()
         obj.deactivate(LayerEnum.L1)
         obj.test() # Second execution
         self.assertEqual(True, obj.base_called)  # Since L1 is deactivated, execution goes L2 -> base
         self.assertEqual(False, obj.l1_called)
         self.assertEqual(True, obj.l2_called)
-        self.assertEqual(['l2', 'base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['l2', 'base'], obj.execution_order) # Check execution order
 
 
+    def test_cpy1_test_nested_activation(self):
+        # A layer activated twice stays active until it is deactivated twice
+        obj = self.obj
+        obj.activate(LayerEnum.L2)
+        obj.activate(LayerEnum.L2)
+        obj.deactivate(LayerEnum.L2)
+        obj.test()
+        self.assertListEqual(['l2', 'base'], obj.execution_order)
+        obj.reset()
+        obj.deactivate(LayerEnum.L2)
+        obj.test()
+        self.assertListEqual(['base'], obj.execution_order)
+        obj.deactivate(LayerEnum.L2) # deactivating an inactive layer is a no-op
+        self.assertEqual([CPy1.Layer.BASE], obj._layer)
+
     def test_cpy1_skiptest_base_called_without_layers(self):
-        obj = CPy1()
+        obj = self.obj
         obj.skiptest()
         self.assertEqual(True, obj.base_called)
         self.assertEqual(False, obj.l1_called)
         self.assertEqual(False, obj.l2_called)
-        self.assertEqual(['skiptest_base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['skiptest_base'], obj.execution_order) # Check execution order
 
     def test_cpy1_skiptest_activate_l2_and_base_called(self):
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L2) # Since skiptest has no L2 layer, base is called
         obj.skiptest()
         self.assertEqual(True, obj.base_called)
         self.assertEqual(False, obj.l1_called)
         self.assertEqual(False, obj.l2_called)
-        self.assertEqual(['skiptest_base'], obj.execution_order) # Check execution order
+        self.assertListEqual(['skiptest_base'], obj.execution_order) # Check execution order
 
     def test_cpy2_test_activate_l1(self):
         # Activate L1 layer for CPy2's test method
@@ -199,36 +355,208 @@ class CPyTest(unittest.TestCase):
 
     def test_cpy1_test_execution_order_l1_l2_l3(self):
         # Check execution order when L1, L2, L3 are activated in order
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         obj.activate(LayerEnum.L2)
         obj.activate(LayerEnum.L3)
         obj._l1_should_proceed = True # Set to call proceed() in L1
         obj.test()
         # Expect execution in defined order (L1 -> L2 -> L3), and base is not called because L3 does not call proceed()
-        self.assertEqual(['l1', 'l2', 'l3'], obj.execution_order)
+        self.assertListEqual(['l1', 'l2', 'l3'], obj.execution_order)
 
     def test_cpy1_test_execution_order_l3_l2_l1(self):
         # Check execution order when L3, L2, L1 are activated in order (confirming execution is by definition order, not activation order)
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L3)
         obj.activate(LayerEnum.L2)
         obj.activate(LayerEnum.L1)
         obj._l1_should_proceed = True # Set to call proceed() in L1
         obj.test()
         # Expect execution in defined order (L1 -> L2 -> L3), and base is not called because L3 does not call proceed()
-        self.assertEqual(['l1', 'l2', 'l3'], obj.execution_order)
+        self.assertListEqual(['l1', 'l2', 'l3'], obj.execution_order)
 
     def test_cpy1_method_with_exception_l1(self):
         # Test case for when an exception occurs in the L1 layer
-        obj = CPy1()
+        obj = self.obj
         obj.activate(LayerEnum.L1)
         with self.assertRaises(ValueError) as cm:
             obj.method_with_exception()
         self.assertEqual("Test Exception", str(cm.exception))
         # Confirm that the base method is not called because an exception occurred
-        self.assertEqual([], obj.execution_order) # Confirm execution order list is empty
+        self.assertListEqual([], obj.execution_order) # Confirm execution order list is empty
+        # Execution state is restored even if an exception occurs
+        with self.assertRaises(RuntimeError):
+            obj.proceed()
+
+    def test_nested_base_method_call(self):
+        # A layer method calling another base method before proceed() resumes its own chain
+        obj = CPy5()
+        obj.activate(LayerEnum.L1)
+        obj.outer()
+        self.assertListEqual(['outer_l1', 'inner_l1', 'inner_base', 'outer_base'], obj.execution_order)
+        with self.assertRaises(RuntimeError):
+            obj.proceed()
+
+    def test_layer_method_for_several_layers(self):
+        # Layer decorators can be stacked; the layer method stays a plain function
+        self.assertEqual({LayerEnum.L1, LayerEnum.L2}, set(CPy8.layers.keys()))
+        obj = CPy8()
+        obj.activate(LayerEnum.L2)
+        self.assertEqual('layer', obj.test())
+        self.assertEqual('layer', obj.test_l1_l2())
+
+    def test_layer_method_registered_without_init_subclass(self):
+        # Registration does not depend on __init_subclass__ reaching CPySingle
+        obj = CPy10()
+        obj.activate(LayerEnum.L1)
+        self.assertEqual('l1', obj.test())
+        obj = CPy11()
+        obj.activate(LayerEnum.L1)
+        self.assertEqual('base', obj.test())
+
+    def test_layer_method_outside_cpysingle(self):
+        # Layer methods can only be registered in classes that derive from CPySingle
+        with self.assertRaises((TypeError, RuntimeError)) as cm:
+            class Plain(object):
+                @cpylayer(LayerEnum.L1, 'test')
+                def test_l1(self):
+                    pass
+        # Python < 3.12 wraps errors raised by __set_name__ in a RuntimeError
+        error = cm.exception.__cause__ or cm.exception
+        self.assertIsInstance(error, TypeError)
+        self.assertIn('inherits from CPySingle', str(error))
+
+    def test_cpy1_chain_cache_shared_between_instances(self):
+        # Instances with the same active layers share one resolved chain
+        obj1 = CPy1()
+        obj2 = CPy1()
+        obj1.activate(LayerEnum.L2)
+        obj2.activate(LayerEnum.L2)
+        obj1.test()
+        size = len(CPy1._chain_cache)
+        obj2.test()
+        self.assertEqual(size, len(CPy1._chain_cache))
+        self.assertListEqual(['l2', 'base'], obj2.execution_order)
+        self.assertIn(CPy1.test_l2, [chain[0] for chain in CPy1._chain_cache.values()])
+        self.assertNotIn(CPy1.test_l2, [chain[0] for chain in CPy2._chain_cache.values()]) # caches are per class
+
+    def test_chain_cache_bounded(self):
+        obj = CPy12()
+        obj.activate(LayerEnum.L3)
+        obj.test()
+        obj.skiptest()
+        obj.test() # used again, so it is now the most recently used chain
+        obj.activate(LayerEnum.L2)
+        obj.test()
+        # the skiptest chain was the least recently used one and is evicted
+        self.assertListEqual([CPy1.test_l3, CPy1.test_l2], [chain[0] for chain in CPy12._chain_cache.values()])
+        self.assertListEqual(['l3', 'skiptest_base', 'l3', 'l2', 'l3'], obj.execution_order)
+
+    def test_layer_states_bounded(self):
+        class StateLayer(Enum):
+            S1 = 's1'
+            S2 = 's2'
+            S3 = 's3'
+
+        self.addCleanup(setattr, cpy, '_layer_states_maxsize', cpy._layer_states_maxsize)
+        cpy._layer_states_maxsize = 4
+        obj = self.obj
+        obj.activate(LayerEnum.L2)
+        for order in itertools.permutations(StateLayer):
+            other = CPySingle()
+            for layer in order:
+                other.activate(layer)
+            self.assertLessEqual(len(cpy._layer_states), 4)
+        # a state from before the table was dropped still selects its own chain
+        obj.test()
+        self.assertListEqual(['l2', 'base'], obj.execution_order)
+        obj.activate(LayerEnum.L1)
+        self.assertEqual([CPy1.Layer.BASE, LayerEnum.L2, LayerEnum.L1], obj._layer)
+
+    def test_base_method_proceed_without_layers(self):
+        # proceed() in the base method returns None, also when no layer is active
+        obj = CPy4()
+        self.assertEqual(('base', None), obj.test())
+        with self.assertRaises(RuntimeError):
+            obj.proceed()
+
+    def test_base_method_proceed_without_layer_methods(self):
+        # Active layers that do not define a method leave its proceed() returning None
+        obj = CPy4()
+        obj.activate(LayerEnum.L1)
+        self.assertEqual(('base', None), obj.test())
 
+    def test_base_method_proceed_in_nested_call(self):
+        # A base method called from another base method call does not proceed() into the outer chain
+        obj = CPy5()
+        self.assertEqual(('wrap', ('probe', None)), obj.wrap())
+        obj.activate(LayerEnum.L1)
+        self.assertEqual(('probe', None), obj.wrap())
+
+    def test_overridden_base_method_calling_super(self):
+        # The parent's base method runs with the subclass as class; it must not get the subclass' chain
+        obj = CPy7()
+        self.assertListEqual(['base7', 'base6'], obj.test())
+        obj.activate(LayerEnum.L1)
+        self.assertListEqual(['l1', 'base7', 'l1', 'base6'], obj.test())
+
+    def test_base_layer_is_reserved(self):
+        with self.assertRaises(ValueError):
+            CPy1.add_method(CPy1.Layer.BASE, 'test', lambda self: 'replaced')
+        with self.assertRaises(ValueError):
+            CPy1.add_layer(CPy1.Layer.BASE)
+        self.assertNotIn(CPy1.Layer.BASE, CPy1.layers)
+
+    def test_chain_cache_purged_on_add_method(self):
+        class CPy3WithLayer(CPy3):
+            pass
+
+        obj = CPy3WithLayer()
+        obj.activate(LayerEnum.L1)
+        self.assertEqual('base', obj.test())
+        CPy3WithLayer.add_method(LayerEnum.L1, 'test', lambda self: 'l1')
+        self.assertEqual('l1', obj.test())
+
+    def test_chain_cache_purged_for_subclasses(self):
+        class CPy3WithLayer(CPy3):
+            pass
+
+        class CPy3WithLayerChild(CPy3WithLayer):
+            pass
+
+        obj = CPy3WithLayerChild()
+        obj.activate(LayerEnum.L1)
+        self.assertEqual('base', obj.test())
+        CPy3WithLayer.add_method(LayerEnum.L1, 'test', lambda self: 'l1')
+        self.assertEqual('l1', obj.test())
+
+    def test_chain_cache_purged_for_shared_registry(self):
+        # A subclass registering layer methods adds them to the registry it shares with its parent;
+        # both classes are local so that the registry of the module-level fixtures stays untouched
+        class Parent(CPySingle):
+            @cpybase
+            def test(self):
+                return ['base']
+
+            @test.layer(LayerEnum.L1)
+            def test_l1(self):
+                return ['l1'] + self.proceed()
+
+        obj = Parent()
+        obj.activate(LayerEnum.L1)
+        obj.activate(LayerEnum.L2)
+        self.assertListEqual(['l1', 'base'], obj.test())
+
+        class Child(Parent):
+            @cpylayer(LayerEnum.L2, 'test')
+            def test_l2(self):
+                return ['l2'] + self.proceed()
+
+        self.assertListEqual(['l1', 'l2', 'base'], obj.test())
+        obj2 = Parent()
+        obj2.activate(LayerEnum.L2)
+        obj2.activate(LayerEnum.L1)
+        self.assertListEqual(['l2', 'l1', 'base'], obj2.test())
 
 if __name__ == '__main__':
     unittest.main()